@@ -5,14 +5,22 @@ Database Models and Connection
 SQLite database schema for feature storage using SQLAlchemy.
 """
 
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, Integer, String, Text, create_engine
+from sqlalchemy import Boolean, Column, Index, Integer, String, Text, create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.types import JSON
 
+# SQLite connection settings
+SQLITE_TIMEOUT = 5.0  # seconds to wait for database lock
+POOL_SIZE = 5  # connections kept open between sessions
+POOL_MAX_OVERFLOW = 10  # extra connections allowed under burst load
+
 Base = declarative_base()
 
 
@@ -20,6 +28,15 @@ class Feature(Base):
     """Feature model representing a test case/feature to implement."""
 
     __tablename__ = "features"
+    __table_args__ = (
+        # Serves the pending-queue lookup in feature_get_next/feature_claim_next:
+        # WHERE passes = 0 ORDER BY priority, id
+        Index(
+            "ix_features_pending_priority",
+            "passes", "priority", "id",
+            sqlite_where=text("passes = 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     priority = Column(Integer, nullable=False, default=999, index=True)
@@ -31,6 +48,7 @@ class Feature(Base):
     passes = Column(Boolean, default=False, index=True)
     in_progress = Column(Boolean, default=False, index=True)
     label = Column(String(100), nullable=True, default=None, index=True)  # Wave/milestone label
+    assigned_agent_id = Column(String(50), nullable=True, default=None, index=True)  # Agent working on it
 
     def to_dict(self) -> dict:
         """Convert feature to dictionary for JSON serialization."""
@@ -45,14 +63,17 @@ class Feature(Base):
             "passes": self.passes,
             "in_progress": self.in_progress,
             "label": self.label,
+            "assigned_agent_id": self.assigned_agent_id,
         }
 
 
+@lru_cache(maxsize=32)
 def get_database_path(project_dir: Path) -> Path:
     """Return the path to the SQLite database for a project."""
     return project_dir / "features.db"
 
 
+@lru_cache(maxsize=32)
 def get_database_url(project_dir: Path) -> str:
     """Return the SQLAlchemy database URL for a project.
 
@@ -62,54 +83,57 @@ def get_database_url(project_dir: Path) -> str:
     return f"sqlite:///{db_path.as_posix()}"
 
 
-def _migrate_add_in_progress_column(engine) -> None:
-    """Add in_progress column to existing databases that don't have it."""
-    from sqlalchemy import text
-
-    with engine.connect() as conn:
-        # Check if column exists
-        result = conn.execute(text("PRAGMA table_info(features)"))
-        columns = [row[1] for row in result.fetchall()]
-
-        if "in_progress" not in columns:
-            # Add the column with default value
-            conn.execute(text("ALTER TABLE features ADD COLUMN in_progress BOOLEAN DEFAULT 0"))
-            conn.commit()
-
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Configure each new SQLite connection for concurrent access.
 
-def _migrate_add_label_column(engine) -> None:
-    """Add label column to existing databases that don't have it."""
-    from sqlalchemy import text
-
-    with engine.connect() as conn:
-        # Check if column exists
+    WAL lets the UI read while an agent writes, and busy_timeout makes
+    writers wait briefly for the lock instead of failing immediately.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+
+# Columns added after the initial schema, with the DDL used to add them to
+# existing databases. Applied in order by _migrate_features_columns.
+_FEATURE_COLUMN_MIGRATIONS = (
+    ("in_progress", "ALTER TABLE features ADD COLUMN in_progress BOOLEAN DEFAULT 0"),
+    ("label", "ALTER TABLE features ADD COLUMN label VARCHAR(100) DEFAULT NULL"),
+    ("type", "ALTER TABLE features ADD COLUMN type VARCHAR(20) DEFAULT 'feature' NOT NULL"),
+    ("assigned_agent_id", "ALTER TABLE features ADD COLUMN assigned_agent_id VARCHAR(50) DEFAULT NULL"),
+)
+
+
+def _migrate_features_columns(engine) -> None:
+    """Add any missing columns to existing databases.
+
+    Probes the schema once with PRAGMA table_info instead of once per column.
+    Each ALTER TABLE commits on its own (pysqlite does not wrap DDL in the
+    transaction), so an interrupted run leaves some columns added and the
+    next startup adds the rest.
+    """
+    with engine.begin() as conn:
         result = conn.execute(text("PRAGMA table_info(features)"))
-        columns = [row[1] for row in result.fetchall()]
-
-        if "label" not in columns:
-            # Add the column with default NULL
-            conn.execute(text("ALTER TABLE features ADD COLUMN label VARCHAR(100) DEFAULT NULL"))
-            conn.commit()
-
+        columns = {row[1] for row in result}
 
-def _migrate_add_type_column(engine) -> None:
-    """Add type column to existing databases that don't have it."""
-    from sqlalchemy import text
+        for column, ddl in _FEATURE_COLUMN_MIGRATIONS:
+            if column not in columns:
+                conn.execute(text(ddl))
 
-    with engine.connect() as conn:
-        # Check if column exists
-        result = conn.execute(text("PRAGMA table_info(features)"))
-        columns = [row[1] for row in result.fetchall()]
-
-        if "type" not in columns:
-            # Add the column with default 'feature'
-            conn.execute(text("ALTER TABLE features ADD COLUMN type VARCHAR(20) DEFAULT 'feature' NOT NULL"))
-            # Create index for better query performance
-            try:
-                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_features_type ON features (type)"))
-            except Exception:
-                pass  # Index might already exist
-            conn.commit()
+        # Indexes for migrated columns (no-op when created by create_all)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_features_type ON features (type)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_features_assigned_agent_id ON features (assigned_agent_id)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_features_pending_priority "
+            "ON features (passes, priority, id) WHERE passes = 0"
+        ))
 
 
 def create_database(project_dir: Path) -> tuple:
@@ -123,18 +147,69 @@ def create_database(project_dir: Path) -> tuple:
         Tuple of (engine, SessionLocal)
     """
     db_url = get_database_url(project_dir)
-    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    engine = create_engine(
+        db_url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": SQLITE_TIMEOUT,
+        },
+        poolclass=QueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
     Base.metadata.create_all(bind=engine)
 
     # Migrate existing databases to add new columns
-    _migrate_add_in_progress_column(engine)
-    _migrate_add_label_column(engine)
-    _migrate_add_type_column(engine)
+    _migrate_features_columns(engine)
 
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # Refresh query planner statistics (cheap; only analyzes where it helps)
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA optimize"))
+
+    # Keep loaded attributes after commit: callers serialize the rows they just
+    # wrote, and expiring them would force a reload SELECT per mutation.
+    SessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+    )
     return engine, SessionLocal
 
 
+# Engines shared by long-lived callers, keyed by database URL
+_engine_cache: dict[str, tuple] = {}
+_engine_cache_lock = threading.Lock()
+
+
+def get_session_maker(project_dir: Path) -> sessionmaker:
+    """
+    Get a cached session maker for a project's database.
+
+    create_database builds a new engine and checks the schema every time,
+    which is far too much work per API request. The first call for a
+    database creates it; later calls reuse the same engine and pool.
+    """
+    db_url = get_database_url(project_dir)
+    with _engine_cache_lock:
+        cached = _engine_cache.get(db_url)
+        if cached is None:
+            cached = create_database(project_dir)
+            _engine_cache[db_url] = cached
+    return cached[1]
+
+
+def dispose_database(project_dir: Path) -> None:
+    """
+    Drop a project's cached engine and close its pooled connections.
+
+    Call before deleting the project's files so no connection keeps the
+    removed database open.
+    """
+    with _engine_cache_lock:
+        cached = _engine_cache.pop(get_database_url(project_dir), None)
+    if cached is not None:
+        cached[0].dispose()
+
+
 # Global session maker - will be set when server starts
 _session_maker: Optional[sessionmaker] = None
 
@@ -159,3 +234,4 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
@@ -6,15 +6,21 @@ Automatically migrates existing feature_list.json files to SQLite database.
 """
 
 import json
+import logging
 import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session, sessionmaker
 
 from api.database import Feature
 
+# Module logger. Migration runs inside the stdio MCP server, where stdout is
+# the protocol channel, so never print() from here.
+logger = logging.getLogger(__name__)
+
 
 def migrate_json_to_sqlite(
     project_dir: Path,
@@ -46,9 +52,7 @@ def migrate_json_to_sqlite(
     try:
         existing_count = session.query(Feature).count()
         if existing_count > 0:
-            print(
-                f"Database already has {existing_count} features, skipping migration"
-            )
+            logger.info("Database already has %d features, skipping migration", existing_count)
             return False
     finally:
         session.close()
@@ -58,43 +62,43 @@ def migrate_json_to_sqlite(
         with open(json_file, "r", encoding="utf-8") as f:
             features_data = json.load(f)
     except json.JSONDecodeError as e:
-        print(f"Error parsing feature_list.json: {e}")
+        logger.error("Error parsing feature_list.json: %s", e)
         return False
     except IOError as e:
-        print(f"Error reading feature_list.json: {e}")
+        logger.error("Error reading feature_list.json: %s", e)
         return False
 
     if not isinstance(features_data, list):
-        print("Error: feature_list.json must contain a JSON array")
+        logger.error("feature_list.json must contain a JSON array")
         return False
 
-    # Import features into database
+    # Import features into database with a single executemany INSERT
     session = session_maker()
     try:
-        imported_count = 0
-        for i, feature_dict in enumerate(features_data):
-            # Handle both old format (no id/priority/name) and new format
-            feature = Feature(
-                id=feature_dict.get("id", i + 1),
-                priority=feature_dict.get("priority", i + 1),
-                category=feature_dict.get("category", "uncategorized"),
-                name=feature_dict.get("name", f"Feature {i + 1}"),
-                description=feature_dict.get("description", ""),
-                steps=feature_dict.get("steps", []),
-                passes=feature_dict.get("passes", False),
-            )
-            session.add(feature)
-            imported_count += 1
-
+        rows = [
+            {
+                # Handle both old format (no id/priority/name) and new format
+                "id": feature_dict.get("id", i + 1),
+                "priority": feature_dict.get("priority", i + 1),
+                "category": feature_dict.get("category", "uncategorized"),
+                "name": feature_dict.get("name", f"Feature {i + 1}"),
+                "description": feature_dict.get("description", ""),
+                "steps": feature_dict.get("steps", []),
+                "passes": feature_dict.get("passes", False),
+            }
+            for i, feature_dict in enumerate(features_data)
+        ]
+        if rows:
+            session.execute(insert(Feature), rows)
         session.commit()
 
         # Verify import
         final_count = session.query(Feature).count()
-        print(f"Migrated {final_count} features from JSON to SQLite")
+        logger.info("Migrated %d features from JSON to SQLite", final_count)
 
     except Exception as e:
         session.rollback()
-        print(f"Error during migration: {e}")
+        logger.error("Error during migration: %s", e)
         return False
     finally:
         session.close()
@@ -105,9 +109,9 @@ def migrate_json_to_sqlite(
 
     try:
         shutil.move(json_file, backup_file)
-        print(f"Original JSON backed up to: {backup_file.name}")
+        logger.info("Original JSON backed up to: %s", backup_file.name)
     except IOError as e:
-        print(f"Warning: Could not backup JSON file: {e}")
+        logger.warning("Could not backup JSON file: %s", e)
         # Continue anyway - the data is in the database
 
     return True
@@ -136,10 +140,11 @@ def export_to_json(
 
     session: Session = session_maker()
     try:
+        # Stream rows in batches so only one batch of ORM objects is alive
         features = (
             session.query(Feature)
             .order_by(Feature.priority.asc(), Feature.id.asc())
-            .all()
+            .yield_per(1000)
         )
 
         features_data = [f.to_dict() for f in features]
@@ -147,7 +152,7 @@ def export_to_json(
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump(features_data, f, indent=2)
 
-        print(f"Exported {len(features_data)} features to {output_file}")
+        logger.info("Exported %d features to %s", len(features_data), output_file)
         return output_file
 
     finally:
@@ -19,16 +19,17 @@ Tools:
 - feature_get_labels: Get all unique labels/milestones with counts
 """
 
-import json
 import os
 import sys
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field
-from sqlalchemy.sql.expression import func
+from sqlalchemy import insert, lambda_stmt, select, update
+from sqlalchemy.sql.expression import case, func
 
 # Add parent directory to path so we can import from api module
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -38,6 +39,8 @@ from api.migration import migrate_json_to_sqlite
 
 # Configuration from environment
 PROJECT_DIR = Path(os.environ.get("PROJECT_DIR", ".")).resolve()
+# Responses are read by the MCP client, so emit compact JSON unless debugging
+PRETTY_JSON = os.environ.get("MCP_PRETTY_JSON", "").lower() == "true"
 
 
 # Pydantic models for input validation
@@ -124,6 +127,36 @@ async def server_lifespan(server: FastMCP):
 mcp = FastMCP("features", lifespan=server_lifespan)
 
 
+_DUMPS_OPTION = orjson.OPT_INDENT_2 if PRETTY_JSON else 0
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool response to a JSON string."""
+    return orjson.dumps(obj, option=_DUMPS_OPTION).decode()
+
+
+# Constant responses, rendered once at import
+_YOLO_ERROR = _dumps({
+    "error": "Regression testing is disabled in YOLO mode",
+    "features": [],
+    "count": 0
+})
+_NO_WORK = _dumps({"error": "All features are passing or assigned to other agents! No more work to do."})
+_NO_CLAIM = _dumps({"error": "No features available to claim. All are passing or assigned."})
+_SKIP_PASSING_ERROR = _dumps({"error": "Cannot skip a feature that is already passing"})
+
+
+def _next_priority(session) -> int:
+    """Return the priority that places a feature at the end of the queue.
+
+    Read from the database on every call rather than cached in memory:
+    each parallel agent runs its own MCP server against the same database,
+    so a per-process counter would go stale.
+    """
+    max_priority = session.query(func.max(Feature.priority)).scalar()
+    return max_priority + 1 if max_priority is not None else 1
+
+
 def get_session():
     """Get a new database session."""
     if _session_maker is None:
@@ -131,6 +164,28 @@ def get_session():
     return _session_maker()
 
 
+@contextmanager
+def session_scope():
+    """
+    Context manager for tool sessions with automatic commit/rollback.
+
+    Tools still commit explicitly before building their response; the
+    commit on exit only closes out read-only transactions.
+
+    Yields:
+        SQLAlchemy session
+    """
+    session = get_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
 @mcp.tool()
 def feature_get_stats() -> str:
     """Get statistics about feature completion progress.
@@ -141,21 +196,21 @@ def feature_get_stats() -> str:
     Returns:
         JSON with: passing (int), in_progress (int), total (int), percentage (float)
     """
-    session = get_session()
-    try:
-        total = session.query(Feature).count()
-        passing = session.query(Feature).filter(Feature.passes == True).count()
-        in_progress = session.query(Feature).filter(Feature.in_progress == True).count()
+    with session_scope() as session:
+        # Single aggregate query instead of one COUNT(*) per status
+        total, passing, in_progress = session.query(
+            func.count(Feature.id),
+            func.coalesce(func.sum(case((Feature.passes == True, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Feature.in_progress == True, 1), else_=0)), 0),
+        ).one()
         percentage = round((passing / total) * 100, 1) if total > 0 else 0.0
 
-        return json.dumps({
+        return _dumps({
             "passing": passing,
             "in_progress": in_progress,
             "total": total,
             "percentage": percentage
-        }, indent=2)
-    finally:
-        session.close()
+        })
 
 
 @mcp.tool()
@@ -183,32 +238,35 @@ def feature_get_next(
     if not agent_id:
         agent_id = os.environ.get("AGENT_ID", "")
 
-    session = get_session()
-    try:
-        query = session.query(Feature).filter(Feature.passes == False)
+    with session_scope() as session:
+        # Polled by every agent; lambda statements cache the compiled SQL so
+        # only the agent_id parameter changes between calls
+        stmt = lambda_stmt(
+            lambda: select(Feature)
+            .where(Feature.passes == False)
+            .order_by(Feature.priority.asc(), Feature.id.asc())
+            .limit(1)
+        )
 
         # If agent_id provided, exclude features assigned to other agents
         if agent_id:
-            query = query.filter(
-                (Feature.assigned_agent_id == None) |
+            stmt += lambda s: s.where(
+                Feature.assigned_agent_id.is_(None) |
                 (Feature.assigned_agent_id == agent_id)
             )
 
-        feature = query.order_by(Feature.priority.asc(), Feature.id.asc()).first()
+        feature = session.execute(stmt).scalar_one_or_none()
 
         if feature is None:
-            return json.dumps({"error": "All features are passing or assigned to other agents! No more work to do."})
+            return _NO_WORK
 
         # In parallel mode, automatically claim the feature to prevent race conditions
         if agent_id and not feature.in_progress:
             feature.in_progress = True
             feature.assigned_agent_id = agent_id
             session.commit()
-            session.refresh(feature)
 
-        return json.dumps(feature.to_dict(), indent=2)
-    finally:
-        session.close()
+        return _dumps(feature.to_dict())
 
 
 @mcp.tool()
@@ -235,14 +293,9 @@ def feature_get_for_regression(
     # but we add a defense-in-depth check here as well)
     yolo_mode = os.environ.get("YOLO_MODE", "").lower() == "true"
     if yolo_mode:
-        return json.dumps({
-            "error": "Regression testing is disabled in YOLO mode",
-            "features": [],
-            "count": 0
-        }, indent=2)
+        return _YOLO_ERROR
 
-    session = get_session()
-    try:
+    with session_scope() as session:
         features = (
             session.query(Feature)
             .filter(Feature.passes == True)
@@ -251,12 +304,10 @@ def feature_get_for_regression(
             .all()
         )
 
-        return json.dumps({
+        return _dumps({
             "features": [f.to_dict() for f in features],
             "count": len(features)
-        }, indent=2)
-    finally:
-        session.close()
+        })
 
 
 @mcp.tool()
@@ -275,22 +326,18 @@ def feature_mark_passing(
     Returns:
         JSON with the updated feature details, or error if not found.
     """
-    session = get_session()
-    try:
-        feature = session.query(Feature).filter(Feature.id == feature_id).first()
+    with session_scope() as session:
+        feature = session.get(Feature, feature_id)
 
         if feature is None:
-            return json.dumps({"error": f"Feature with ID {feature_id} not found"})
+            return _dumps({"error": f"Feature with ID {feature_id} not found"})
 
         feature.passes = True
         feature.in_progress = False
         feature.assigned_agent_id = None  # Clear agent assignment on completion
         session.commit()
-        session.refresh(feature)
 
-        return json.dumps(feature.to_dict(), indent=2)
-    finally:
-        session.close()
+        return _dumps(feature.to_dict())
 
 
 @mcp.tool()
@@ -314,36 +361,31 @@ def feature_skip(
     Returns:
         JSON with skip details: id, name, old_priority, new_priority, message
     """
-    session = get_session()
-    try:
-        feature = session.query(Feature).filter(Feature.id == feature_id).first()
+    with session_scope() as session:
+        feature = session.get(Feature, feature_id)
 
         if feature is None:
-            return json.dumps({"error": f"Feature with ID {feature_id} not found"})
+            return _dumps({"error": f"Feature with ID {feature_id} not found"})
 
         if feature.passes:
-            return json.dumps({"error": "Cannot skip a feature that is already passing"})
+            return _SKIP_PASSING_ERROR
 
         old_priority = feature.priority
 
-        # Get max priority and set this feature to max + 1
-        max_priority_result = session.query(Feature.priority).order_by(Feature.priority.desc()).first()
-        new_priority = (max_priority_result[0] + 1) if max_priority_result else 1
+        # Move this feature behind everything else in the queue
+        new_priority = _next_priority(session)
 
         feature.priority = new_priority
         feature.in_progress = False
         session.commit()
-        session.refresh(feature)
 
-        return json.dumps({
+        return _dumps({
             "id": feature.id,
             "name": feature.name,
             "old_priority": old_priority,
             "new_priority": new_priority,
             "message": f"Feature '{feature.name}' moved to end of queue"
-        }, indent=2)
-    finally:
-        session.close()
+        })
 
 
 @mcp.tool()
@@ -363,20 +405,19 @@ def feature_mark_in_progress(
     Returns:
         JSON with the updated feature details, or error if not found or already in-progress by another agent.
     """
-    session = get_session()
-    try:
-        feature = session.query(Feature).filter(Feature.id == feature_id).first()
+    with session_scope() as session:
+        feature = session.get(Feature, feature_id)
 
         if feature is None:
-            return json.dumps({"error": f"Feature with ID {feature_id} not found"})
+            return _dumps({"error": f"Feature with ID {feature_id} not found"})
 
         if feature.passes:
-            return json.dumps({"error": f"Feature with ID {feature_id} is already passing"})
+            return _dumps({"error": f"Feature with ID {feature_id} is already passing"})
 
         # Check if already in progress by another agent
         if feature.in_progress and feature.assigned_agent_id and agent_id:
             if feature.assigned_agent_id != agent_id:
-                return json.dumps({
+                return _dumps({
                     "error": f"Feature with ID {feature_id} is already in-progress by agent {feature.assigned_agent_id}"
                 })
 
@@ -384,11 +425,8 @@ def feature_mark_in_progress(
         if agent_id:
             feature.assigned_agent_id = agent_id
         session.commit()
-        session.refresh(feature)
 
-        return json.dumps(feature.to_dict(), indent=2)
-    finally:
-        session.close()
+        return _dumps(feature.to_dict())
 
 
 @mcp.tool()
@@ -406,21 +444,17 @@ def feature_clear_in_progress(
     Returns:
         JSON with the updated feature details, or error if not found.
     """
-    session = get_session()
-    try:
-        feature = session.query(Feature).filter(Feature.id == feature_id).first()
+    with session_scope() as session:
+        feature = session.get(Feature, feature_id)
 
         if feature is None:
-            return json.dumps({"error": f"Feature with ID {feature_id} not found"})
+            return _dumps({"error": f"Feature with ID {feature_id} not found"})
 
         feature.in_progress = False
         feature.assigned_agent_id = None
         session.commit()
-        session.refresh(feature)
 
-        return json.dumps(feature.to_dict(), indent=2)
-    finally:
-        session.close()
+        return _dumps(feature.to_dict())
 
 
 @mcp.tool()
@@ -439,39 +473,41 @@ def feature_claim_next(
     Returns:
         JSON with the claimed feature details, or error if no features available.
     """
-    session = get_session()
     try:
-        # Find the next available feature not assigned to another agent
-        # A feature is available if:
-        # 1. Not in progress AND not assigned to anyone, OR
-        # 2. Already assigned to this agent (allow re-claiming own feature)
-        feature = (
-            session.query(Feature)
-            .filter(Feature.passes == False)
-            .filter(
-                ((Feature.in_progress == False) & (Feature.assigned_agent_id == None)) |
-                (Feature.assigned_agent_id == agent_id)
+        with session_scope() as session:
+            # Find and claim the next available feature in a single statement
+            # A feature is available if:
+            # 1. Not in progress AND not assigned to anyone, OR
+            # 2. Already assigned to this agent (allow re-claiming own feature)
+            # SQLite has no SELECT ... FOR UPDATE, so selecting first and updating
+            # afterwards lets two agents claim the same row; UPDATE ... RETURNING
+            # picks and claims it atomically under the write lock.
+            next_id = (
+                select(Feature.id)
+                .where(Feature.passes == False)
+                .where(
+                    ((Feature.in_progress == False) & (Feature.assigned_agent_id.is_(None))) |
+                    (Feature.assigned_agent_id == agent_id)
+                )
+                .order_by(Feature.priority.asc(), Feature.id.asc())
+                .limit(1)
+                .scalar_subquery()
             )
-            .order_by(Feature.priority.asc(), Feature.id.asc())
-            .with_for_update()  # Lock the row
-            .first()
-        )
+            feature = session.execute(
+                update(Feature)
+                .where(Feature.id == next_id)
+                .values(in_progress=True, assigned_agent_id=agent_id)
+                .returning(Feature)
+            ).scalar_one_or_none()
 
-        if feature is None:
-            return json.dumps({"error": "No features available to claim. All are passing or assigned."})
+            if feature is None:
+                return _NO_CLAIM
 
-        # Claim the feature
-        feature.in_progress = True
-        feature.assigned_agent_id = agent_id
-        session.commit()
-        session.refresh(feature)
+            session.commit()
 
-        return json.dumps(feature.to_dict(), indent=2)
+            return _dumps(feature.to_dict())
     except Exception as e:
-        session.rollback()
-        return json.dumps({"error": f"Failed to claim feature: {str(e)}"})
-    finally:
-        session.close()
+        return _dumps({"error": f"Failed to claim feature: {str(e)}"})
 
 
 @mcp.tool()
@@ -491,31 +527,27 @@ def feature_release(
     Returns:
         JSON with the updated feature details, or error if not found.
     """
-    session = get_session()
-    try:
-        feature = session.query(Feature).filter(Feature.id == feature_id).first()
+    with session_scope() as session:
+        feature = session.get(Feature, feature_id)
 
         if feature is None:
-            return json.dumps({"error": f"Feature with ID {feature_id} not found"})
+            return _dumps({"error": f"Feature with ID {feature_id} not found"})
 
         # Only release if the agent owns it or no agent specified
         if agent_id and feature.assigned_agent_id and feature.assigned_agent_id != agent_id:
-            return json.dumps({
+            return _dumps({
                 "error": f"Feature is assigned to agent {feature.assigned_agent_id}, not {agent_id}"
             })
 
         feature.in_progress = False
         feature.assigned_agent_id = None
         session.commit()
-        session.refresh(feature)
 
-        return json.dumps({
+        return _dumps({
             "released": True,
             "feature": feature.to_dict(),
             "message": f"Feature '{feature.name}' released back to queue"
-        }, indent=2)
-    finally:
-        session.close()
+        })
 
 
 @mcp.tool()
@@ -544,51 +576,49 @@ def feature_create_bulk(
     Returns:
         JSON with: created (int) - number of features created, label (str|null)
     """
-    session = get_session()
     try:
-        # Get the starting priority
-        max_priority_result = session.query(Feature.priority).order_by(Feature.priority.desc()).first()
-        start_priority = (max_priority_result[0] + 1) if max_priority_result else 1
-
-        created_count = 0
-        for i, feature_data in enumerate(features):
-            # Validate required fields
-            if not all(key in feature_data for key in ["category", "name", "description", "steps"]):
-                return json.dumps({
-                    "error": f"Feature at index {i} missing required fields (category, name, description, steps)"
+        with session_scope() as session:
+            # Get the starting priority
+            start_priority = _next_priority(session)
+
+            rows = []
+            for i, feature_data in enumerate(features):
+                # Validate required fields
+                if not all(key in feature_data for key in ["category", "name", "description", "steps"]):
+                    return _dumps({
+                        "error": f"Feature at index {i} missing required fields (category, name, description, steps)"
+                    })
+
+                # Get type from feature_data, default to 'feature'
+                feature_type = feature_data.get("type", "feature")
+
+                # Calculate priority with boost for bugs
+                base_priority = start_priority + i
+                if feature_type == "bug":
+                    priority = base_priority - 500  # Bugs get higher priority (lower number)
+                else:
+                    priority = base_priority
+
+                rows.append({
+                    "priority": priority,
+                    "type": feature_type,
+                    "category": feature_data["category"],
+                    "name": feature_data["name"],
+                    "description": feature_data["description"],
+                    "steps": feature_data["steps"],
+                    "passes": False,
+                    "label": label,
                 })
 
-            # Get type from feature_data, default to 'feature'
-            feature_type = feature_data.get("type", "feature")
-
-            # Calculate priority with boost for bugs
-            base_priority = start_priority + i
-            if feature_type == "bug":
-                priority = base_priority - 500  # Bugs get higher priority (lower number)
-            else:
-                priority = base_priority
-
-            db_feature = Feature(
-                priority=priority,
-                type=feature_type,
-                category=feature_data["category"],
-                name=feature_data["name"],
-                description=feature_data["description"],
-                steps=feature_data["steps"],
-                passes=False,
-                label=label,
-            )
-            session.add(db_feature)
-            created_count += 1
-
-        session.commit()
+            # Single executemany INSERT instead of one ORM object per feature
+            if rows:
+                session.execute(insert(Feature), rows)
+            session.commit()
+            created_count = len(rows)
 
-        return json.dumps({"created": created_count, "label": label}, indent=2)
+            return _dumps({"created": created_count, "label": label})
     except Exception as e:
-        session.rollback()
-        return json.dumps({"error": str(e)})
-    finally:
-        session.close()
+        return _dumps({"error": str(e)})
 
 
 @mcp.tool()
@@ -601,24 +631,28 @@ def feature_get_existing() -> str:
     Returns:
         JSON with: features (list of {id, name, category, label, passes})
     """
-    session = get_session()
-    try:
-        features = session.query(Feature).all()
-        return json.dumps({
-            "features": [
-                {
-                    "id": f.id,
-                    "name": f.name,
-                    "category": f.category,
-                    "label": f.label,
-                    "passes": f.passes
-                }
-                for f in features
-            ],
+    with session_scope() as session:
+        # Select only the returned columns; skips loading description/steps.
+        # Stream rows in batches instead of holding every Row alongside the
+        # output dicts on large backlogs.
+        result = session.execute(
+            select(Feature.id, Feature.name, Feature.category, Feature.label, Feature.passes)
+            .execution_options(yield_per=500)
+        )
+        features = [
+            {
+                "id": feature_id,
+                "name": name,
+                "category": category,
+                "label": label,
+                "passes": passes
+            }
+            for feature_id, name, category, label, passes in result
+        ]
+        return _dumps({
+            "features": features,
             "count": len(features)
-        }, indent=2)
-    finally:
-        session.close()
+        })
 
 
 @mcp.tool()
@@ -628,40 +662,37 @@ def feature_get_labels() -> str:
     Returns:
         JSON with: labels (list of {label, count, passing, pending, in_progress})
     """
-    session = get_session()
-    try:
-        # Get all features grouped by label
-        features = session.query(Feature).all()
-
-        label_stats: dict[str | None, dict] = {}
-        for f in features:
-            label_key = f.label  # None for "Initial"
-            if label_key not in label_stats:
-                label_stats[label_key] = {
-                    "label": label_key,
-                    "count": 0,
-                    "passing": 0,
-                    "pending": 0,
-                    "in_progress": 0
-                }
-
-            label_stats[label_key]["count"] += 1
-            if f.passes:
-                label_stats[label_key]["passing"] += 1
-            elif f.in_progress:
-                label_stats[label_key]["in_progress"] += 1
-            else:
-                label_stats[label_key]["pending"] += 1
+    with session_scope() as session:
+        # Aggregate per label in SQL; a passing feature never counts as in-progress
+        rows = (
+            session.query(
+                Feature.label,
+                func.count(Feature.id),
+                func.sum(case((Feature.passes == True, 1), else_=0)),
+                func.sum(case((Feature.passes == True, 0), (Feature.in_progress == True, 1), else_=0)),
+            )
+            .group_by(Feature.label)
+            .all()
+        )
+
+        label_stats = [
+            {
+                "label": label,  # None for "Initial"
+                "count": count,
+                "passing": passing,
+                "pending": count - passing - in_progress,
+                "in_progress": in_progress
+            }
+            for label, count, passing, in_progress in rows
+        ]
 
         # Sort: None (Initial) first, then by label name
         sorted_labels = sorted(
-            label_stats.values(),
+            label_stats,
             key=lambda x: (x["label"] is not None, x["label"] or "")
         )
 
-        return json.dumps({"labels": sorted_labels}, indent=2)
-    finally:
-        session.close()
+        return _dumps({"labels": sorted_labels})
 
 
 @mcp.tool()
@@ -687,36 +718,31 @@ def feature_create(
     Returns:
         JSON with the created feature details, or error if creation failed.
     """
-    session = get_session()
     try:
-        # Get next priority
-        max_priority_result = session.query(Feature.priority).order_by(Feature.priority.desc()).first()
-        priority = (max_priority_result[0] + 1) if max_priority_result else 1
-
-        # Apply priority boost for bugs
-        if type == "bug":
-            priority -= 500
-
-        db_feature = Feature(
-            priority=priority,
-            type=type,
-            category=category,
-            name=name,
-            description=description,
-            steps=steps,
-            passes=False,
-        )
+        with session_scope() as session:
+            # Get next priority
+            priority = _next_priority(session)
 
-        session.add(db_feature)
-        session.commit()
-        session.refresh(db_feature)
+            # Apply priority boost for bugs
+            if type == "bug":
+                priority -= 500
+
+            db_feature = Feature(
+                priority=priority,
+                type=type,
+                category=category,
+                name=name,
+                description=description,
+                steps=steps,
+                passes=False,
+            )
+
+            session.add(db_feature)
+            session.commit()
 
-        return json.dumps(db_feature.to_dict(), indent=2)
+            return _dumps(db_feature.to_dict())
     except Exception as e:
-        session.rollback()
-        return json.dumps({"error": str(e)})
-    finally:
-        session.close()
+        return _dumps({"error": str(e)})
 
 
 @mcp.tool()
@@ -742,32 +768,28 @@ def feature_update(
     Returns:
         JSON with the updated feature details, or error if not found.
     """
-    session = get_session()
     try:
-        feature = session.query(Feature).filter(Feature.id == feature_id).first()
-
-        if feature is None:
-            return json.dumps({"error": f"Feature with ID {feature_id} not found"})
-
-        # Apply partial updates
-        if category is not None:
-            feature.category = category
-        if name is not None:
-            feature.name = name
-        if description is not None:
-            feature.description = description
-        if steps is not None:
-            feature.steps = steps
+        with session_scope() as session:
+            feature = session.get(Feature, feature_id)
+
+            if feature is None:
+                return _dumps({"error": f"Feature with ID {feature_id} not found"})
+
+            # Apply partial updates
+            if category is not None:
+                feature.category = category
+            if name is not None:
+                feature.name = name
+            if description is not None:
+                feature.description = description
+            if steps is not None:
+                feature.steps = steps
 
-        session.commit()
-        session.refresh(feature)
+            session.commit()
 
-        return json.dumps(feature.to_dict(), indent=2)
+            return _dumps(feature.to_dict())
     except Exception as e:
-        session.rollback()
-        return json.dumps({"error": str(e)})
-    finally:
-        session.close()
+        return _dumps({"error": str(e)})
 
 
 @mcp.tool()
@@ -789,33 +811,30 @@ def feature_delete(
     Returns:
         JSON with success message, or error if not found.
     """
-    session = get_session()
     try:
-        feature = session.query(Feature).filter(Feature.id == feature_id).first()
+        with session_scope() as session:
+            feature = session.get(Feature, feature_id)
 
-        if feature is None:
-            return json.dumps({"error": f"Feature with ID {feature_id} not found"})
+            if feature is None:
+                return _dumps({"error": f"Feature with ID {feature_id} not found"})
 
-        feature_name = feature.name
-        was_passing = feature.passes
+            feature_name = feature.name
+            was_passing = feature.passes
 
-        session.delete(feature)
-        session.commit()
+            session.delete(feature)
+            session.commit()
 
-        result = {
-            "success": True,
-            "message": f"Feature '{feature_name}' deleted from backlog"
-        }
+            result = {
+                "success": True,
+                "message": f"Feature '{feature_name}' deleted from backlog"
+            }
 
-        if was_passing:
-            result["note"] = "Feature was marked passing - code remains in codebase. Create a removal feature if code cleanup is needed."
+            if was_passing:
+                result["note"] = "Feature was marked passing - code remains in codebase. Create a removal feature if code cleanup is needed."
 
-        return json.dumps(result, indent=2)
+            return _dumps(result)
     except Exception as e:
-        session.rollback()
-        return json.dumps({"error": str(e)})
-    finally:
-        session.close()
+        return _dumps({"error": str(e)})
 
 
 if __name__ == "__main__":
@@ -5,14 +5,17 @@ Add Features Router
 WebSocket and REST endpoints for adding features to existing projects with AI assistance.
 """
 
+import asyncio
 import json
 import logging
 import re
+import sys
 from pathlib import Path
 from typing import Optional
 
+import orjson
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from ..schemas import ImageAttachment
 from ..services.add_features_session import (
@@ -30,18 +33,35 @@ router = APIRouter(prefix="/api/add-features", tags=["add-features"])
 # Root directory
 ROOT_DIR = Path(__file__).parent.parent.parent
 
+# Add root to path for registry import
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from registry import get_project_path
+
+# Validates a message's attachments in one call
+_ATTACHMENTS_ADAPTER = TypeAdapter(list[ImageAttachment])
+
+# Messages larger than this (in characters) are decoded and have their
+# attachments validated in a worker thread
+OFFLOAD_MESSAGE_SIZE = 256 * 1024
+
+# Context prepended to bug reports
+_BUG_PREFIX = "[User wants to report bugs/issues] "
+_BUG_SCREENSHOTS_ONLY = "[User wants to report bugs/issues (see attached screenshots)]"
+
 
 def _get_project_path(project_name: str) -> Path:
     """Get project path from registry."""
-    import sys
-    root = Path(__file__).parent.parent.parent
-    if str(root) not in sys.path:
-        sys.path.insert(0, str(root))
-
-    from registry import get_project_path
     return get_project_path(project_name)
 
 
+async def _send_json(websocket: WebSocket, data: dict) -> None:
+    """Send a JSON text frame, encoded with orjson instead of stdlib json."""
+    # Stays a text frame: the UI JSON.parse()s event.data directly
+    await websocket.send_text(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode())
+
+
 def validate_project_name(name: str) -> bool:
     """Validate project name to prevent path traversal."""
     return bool(re.match(r'^[a-zA-Z0-9_-]{1,50}$', name))
@@ -151,11 +171,14 @@ async def add_features_websocket(websocket: WebSocket, project_name: str):
             try:
                 # Receive message from client
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                if len(data) > OFFLOAD_MESSAGE_SIZE:
+                    message = await asyncio.to_thread(orjson.loads, data)
+                else:
+                    message = orjson.loads(data)
                 msg_type = message.get("type")
 
                 if msg_type == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    await _send_json(websocket, {"type": "pong"})
                     continue
 
                 elif msg_type == "start":
@@ -164,14 +187,14 @@ async def add_features_websocket(websocket: WebSocket, project_name: str):
 
                     # Stream the initial greeting
                     async for chunk in session.start():
-                        await websocket.send_json(chunk)
+                        await _send_json(websocket, chunk)
 
                 elif msg_type == "message":
                     # User sent a message
                     if not session:
                         session = get_add_features_session(project_name)
                         if not session:
-                            await websocket.send_json({
+                            await _send_json(websocket, {
                                 "type": "error",
                                 "content": "No active session. Send 'start' first."
                             })
@@ -185,11 +208,17 @@ async def add_features_websocket(websocket: WebSocket, project_name: str):
                     raw_attachments = message.get("attachments", [])
                     if raw_attachments:
                         try:
-                            for raw_att in raw_attachments:
-                                attachments.append(ImageAttachment(**raw_att))
+                            # Validation base64-decodes every image; keep large
+                            # payloads from stalling the event loop
+                            if len(data) > OFFLOAD_MESSAGE_SIZE:
+                                attachments = await asyncio.to_thread(
+                                    _ATTACHMENTS_ADAPTER.validate_python, raw_attachments
+                                )
+                            else:
+                                attachments = _ATTACHMENTS_ADAPTER.validate_python(raw_attachments)
                         except (ValidationError, Exception) as e:
                             logger.warning(f"Invalid attachment data: {e}")
-                            await websocket.send_json({
+                            await _send_json(websocket, {
                                 "type": "error",
                                 "content": f"Invalid attachment: {str(e)}"
                             })
@@ -197,7 +226,7 @@ async def add_features_websocket(websocket: WebSocket, project_name: str):
 
                     # Allow empty content if attachments are present
                     if not user_content and not attachments:
-                        await websocket.send_json({
+                        await _send_json(websocket, {
                             "type": "error",
                             "content": "Empty message"
                         })
@@ -206,21 +235,21 @@ async def add_features_websocket(websocket: WebSocket, project_name: str):
                     # Prepend type context to help Claude understand intent
                     if feature_type == "bug":
                         # Add context that user wants to report bugs
-                        contextual_message = f"[User wants to report bugs/issues] {user_content}" if user_content else "[User wants to report bugs/issues (see attached screenshots)]"
+                        contextual_message = _BUG_PREFIX + user_content if user_content else _BUG_SCREENSHOTS_ONLY
                     else:
                         # Default to features
                         contextual_message = user_content
 
                     # Stream Claude's response
                     async for chunk in session.send_message(contextual_message, attachments if attachments else None):
-                        await websocket.send_json(chunk)
+                        await _send_json(websocket, chunk)
 
                 elif msg_type == "answer":
                     # User answered a structured question
                     if not session:
                         session = get_add_features_session(project_name)
                         if not session:
-                            await websocket.send_json({
+                            await _send_json(websocket, {
                                 "type": "error",
                                 "content": "No active session"
                             })
@@ -241,22 +270,22 @@ async def add_features_websocket(websocket: WebSocket, project_name: str):
 
                     # Stream Claude's response
                     async for chunk in session.send_message(user_response):
-                        await websocket.send_json(chunk)
+                        await _send_json(websocket, chunk)
 
                 elif msg_type == "done":
                     # User is done adding features
                     if session:
                         session.complete = True
-                    await websocket.send_json({"type": "complete"})
+                    await _send_json(websocket, {"type": "complete"})
 
                 else:
-                    await websocket.send_json({
+                    await _send_json(websocket, {
                         "type": "error",
                         "content": f"Unknown message type: {msg_type}"
                     })
 
-            except json.JSONDecodeError:
-                await websocket.send_json({
+            except json.JSONDecodeError:  # also raised by orjson
+                await _send_json(websocket, {
                     "type": "error",
                     "content": "Invalid JSON"
                 })
@@ -267,7 +296,7 @@ async def add_features_websocket(websocket: WebSocket, project_name: str):
     except Exception as e:
         logger.exception(f"Add features WebSocket error for {project_name}")
         try:
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "type": "error",
                 "content": f"Server error: {str(e)}"
             })
@@ -19,7 +19,7 @@ from ..schemas import (
 )
 
 # Lazy imports to avoid circular dependencies
-_create_database = None
+_get_session_maker = None
 _Feature = None
 
 logger = logging.getLogger(__name__)
@@ -38,17 +38,17 @@ def _get_project_path(project_name: str) -> Path:
 
 def _get_db_classes():
     """Lazy import of database classes."""
-    global _create_database, _Feature
-    if _create_database is None:
+    global _get_session_maker, _Feature
+    if _get_session_maker is None:
         import sys
         from pathlib import Path
         root = Path(__file__).parent.parent.parent
         if str(root) not in sys.path:
             sys.path.insert(0, str(root))
-        from api.database import Feature, create_database
-        _create_database = create_database
+        from api.database import Feature, get_session_maker
+        _get_session_maker = get_session_maker
         _Feature = Feature
-    return _create_database, _Feature
+    return _get_session_maker, _Feature
 
 
 router = APIRouter(prefix="/api/projects/{project_name}/features", tags=["features"])
@@ -70,9 +70,8 @@ def get_db_session(project_dir: Path):
     Context manager for database sessions.
     Ensures session is always closed, even on exceptions.
     """
-    create_database, _ = _get_db_classes()
-    _, SessionLocal = create_database(project_dir)
-    session = SessionLocal()
+    get_session_maker, _ = _get_db_classes()
+    session = get_session_maker(project_dir)()
     try:
         yield session
     finally:
@@ -5,16 +5,36 @@ Process Management Router
 API endpoints for viewing and managing all agent processes.
 """
 
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
 import psutil
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
-import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/processes", tags=["processes"])
 
+# Seconds to reuse the last process scan, so back-to-back UI polls
+# don't each walk every process on the system
+PROCESS_CACHE_TTL = 1.5
+
+_process_cache = {"ts": 0.0, "data": []}
+
+# Upper bound on agents killed concurrently by kill-all
+KILL_WORKERS = 16
+
+# PROJECT_DIR=<value> runs to the next comma or double quote; --project-dir
+# takes the following whitespace-delimited token
+_PROJECT_DIR_ENV_RE = re.compile(r'PROJECT_DIR=[\'"]?([^,"]*)')
+_PROJECT_DIR_ARG_RE = re.compile(r'--project-dir(?:=|\s+)(\S+)')
+
 
 class ProcessInfo(BaseModel):
     """Information about a running process."""
@@ -46,80 +66,129 @@ class KillProcessResponse(BaseModel):
     pid: int
 
 
-def is_agent_process(proc: psutil.Process) -> bool:
-    """Check if a process is an agent process."""
-    try:
-        cmdline = ' '.join(proc.cmdline())
+def _is_agent_cmdline(cmdline: str) -> bool:
+    """Check if a joined command line belongs to an agent process."""
+    # Check for autonomous_agent_demo
+    if 'autonomous_agent_demo' in cmdline:
+        return True
 
-        # Check for autonomous_agent_demo
-        if 'autonomous_agent_demo' in cmdline:
-            return True
+    # Check for Claude SDK processes
+    if 'claude' in cmdline and '--output-format' in cmdline and 'stream-json' in cmdline:
+        return True
 
-        # Check for Claude SDK processes
-        if 'claude' in cmdline and '--output-format' in cmdline and 'stream-json' in cmdline:
-            return True
+    # Check for Python processes running agent.py
+    if 'python' in cmdline and 'agent.py' in cmdline:
+        return True
 
-        # Check for Python processes running agent.py
-        if 'python' in cmdline and 'agent.py' in cmdline:
-            return True
+    return False
 
-        return False
+
+def is_agent_process(proc: psutil.Process) -> bool:
+    """Check if a process is an agent process."""
+    try:
+        return _is_agent_cmdline(' '.join(proc.cmdline()))
     except (psutil.NoSuchProcess, psutil.AccessDenied):
         return False
 
 
 def extract_project_dir(cmdline: str) -> Optional[str]:
     """Extract project directory from command line."""
+    # Look for PROJECT_DIR env var, then the --project-dir argument
+    match = _PROJECT_DIR_ENV_RE.search(cmdline) or _PROJECT_DIR_ARG_RE.search(cmdline)
+    if match is None:
+        return None
+    return match.group(1).strip('\'"')
+
+
+def _descendant_pids(pid: int, children_of: dict[int, list[int]]) -> list[int]:
+    """Collect all descendants of pid from a parent -> children pid map."""
+    descendants = []
+    seen = {pid}
+    queue = deque(children_of.get(pid, ()))
+    while queue:
+        child = queue.popleft()
+        if child in seen:
+            continue
+        seen.add(child)
+        descendants.append(child)
+        queue.extend(children_of.get(child, ()))
+    return descendants
+
+
+def _kill_tree(
+    proc: psutil.Process,
+    children_of: Optional[dict[int, list[int]]] = None,
+    procs: Optional[dict[int, psutil.Process]] = None,
+) -> None:
+    """
+    Kill a process after all of its children.
+
+    children_of is a parent -> children pid map and procs the pid -> Process
+    map from the same earlier scan of all processes. Reusing those Process
+    objects keeps psutil's PID-reuse check tied to that scan. Without them
+    psutil walks the process table for this tree.
+    """
+    if children_of is None or procs is None:
+        children = proc.children(recursive=True)
+    else:
+        children = [procs[pid] for pid in _descendant_pids(proc.pid, children_of)]
+
+    for child in children:
+        try:
+            child.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+    # A nested agent may already be gone as part of another agent's tree
     try:
-        # Look for PROJECT_DIR env var
-        if 'PROJECT_DIR=' in cmdline:
-            start = cmdline.index('PROJECT_DIR=') + len('PROJECT_DIR=')
-            end = cmdline.find(',', start)
-            if end == -1:
-                end = cmdline.find('"', start)
-            if end == -1:
-                end = len(cmdline)
-            project_dir = cmdline[start:end].strip('\'"')
-            return project_dir
-
-        # Look for --project-dir argument
-        if '--project-dir' in cmdline:
-            parts = cmdline.split('--project-dir')
-            if len(parts) > 1:
-                after = parts[1].strip().split()[0]
-                return after.strip('\'"')
+        proc.kill()
+    except psutil.NoSuchProcess:
+        pass
 
-        return None
-    except Exception:
-        return None
 
+def _invalidate_process_cache() -> None:
+    """Force the next list request to rescan processes."""
+    _process_cache["ts"] = 0.0
+
+
+def _list_processes_sync() -> ProcessListResponse:
+    """Scan for agent processes (blocking)."""
+    now = time.monotonic()
+    if now - _process_cache["ts"] < PROCESS_CACHE_TTL:
+        processes = _process_cache["data"]
+        return ProcessListResponse(
+            processes=processes,
+            total=len(processes)
+        )
 
-@router.get("", response_model=ProcessListResponse)
-async def list_processes():
-    """List all running agent processes."""
     processes = []
 
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'cpu_percent', 'memory_info', 'status', 'create_time']):
+    # Prefetch only what the agent filter needs; the rest is read per agent
+    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
         try:
-            if is_agent_process(proc):
-                cmdline_list = proc.info.get('cmdline', [])
-                cmdline = ' '.join(cmdline_list) if cmdline_list else ''
+            # Join the command line once for detection, display and parsing
+            cmdline_list = proc.info.get('cmdline')
+            full_cmdline = ' '.join(cmdline_list) if cmdline_list else ''
+
+            if _is_agent_cmdline(full_cmdline):
+                cmdline = full_cmdline
 
                 # Truncate very long command lines
                 if len(cmdline) > 200:
                     cmdline = cmdline[:200] + '...'
 
-                memory_mb = proc.info['memory_info'].rss / (1024 * 1024) if proc.info.get('memory_info') else 0
+                details = proc.as_dict(attrs=['cpu_percent', 'memory_info', 'status', 'create_time'])
+                memory_mb = details['memory_info'].rss / (1024 * 1024) if details.get('memory_info') else 0
 
                 process_info = ProcessInfo(
                     pid=proc.info['pid'],
                     name=proc.info['name'],
                     cmdline=cmdline,
-                    project_dir=extract_project_dir(' '.join(cmdline_list)),
-                    cpu_percent=proc.info.get('cpu_percent', 0) or 0,
+                    project_dir=extract_project_dir(full_cmdline),
+                    cpu_percent=details.get('cpu_percent', 0) or 0,
                     memory_mb=round(memory_mb, 2),
-                    status=proc.info.get('status', 'unknown'),
-                    create_time=proc.info.get('create_time', 0)
+                    status=details.get('status', 'unknown'),
+                    create_time=details.get('create_time', 0)
                 )
                 processes.append(process_info)
         except (psutil.NoSuchProcess, psutil.AccessDenied):
@@ -128,102 +197,102 @@ async def list_processes():
     # Sort by create_time (newest first)
     processes.sort(key=lambda p: p.create_time, reverse=True)
 
+    _process_cache["data"] = processes
+    _process_cache["ts"] = now
+
     return ProcessListResponse(
         processes=processes,
         total=len(processes)
     )
 
 
-@router.post("/kill", response_model=KillProcessResponse)
-async def kill_process(request: KillProcessRequest):
-    """Kill a specific process by PID."""
+def _kill_process_sync(pid: int) -> KillProcessResponse:
+    """Kill an agent process and its children (blocking)."""
     try:
-        proc = psutil.Process(request.pid)
+        proc = psutil.Process(pid)
 
         # Verify it's an agent process before killing
         if not is_agent_process(proc):
             raise HTTPException(
                 status_code=403,
-                detail=f"Process {request.pid} is not an agent process"
+                detail=f"Process {pid} is not an agent process"
             )
 
         # Kill the process and all its children
         try:
-            # First try to get children
-            children = proc.children(recursive=True)
-
-            # Kill children first
-            for child in children:
-                try:
-                    child.kill()
-                except psutil.NoSuchProcess:
-                    pass
-
-            # Kill the parent
-            proc.kill()
+            _kill_tree(proc)
+            _invalidate_process_cache()
 
             # Wait for termination
             proc.wait(timeout=3)
 
             return KillProcessResponse(
                 success=True,
-                message=f"Process {request.pid} killed successfully",
-                pid=request.pid
+                message=f"Process {pid} killed successfully",
+                pid=pid
             )
         except psutil.TimeoutExpired:
             return KillProcessResponse(
                 success=True,
-                message=f"Process {request.pid} kill signal sent (timeout waiting for termination)",
-                pid=request.pid
+                message=f"Process {pid} kill signal sent (timeout waiting for termination)",
+                pid=pid
             )
     except psutil.NoSuchProcess:
         raise HTTPException(
             status_code=404,
-            detail=f"Process {request.pid} not found"
+            detail=f"Process {pid} not found"
         )
     except psutil.AccessDenied:
         raise HTTPException(
             status_code=403,
-            detail=f"Access denied to kill process {request.pid}"
+            detail=f"Access denied to kill process {pid}"
         )
     except Exception as e:
-        logger.error(f"Error killing process {request.pid}: {e}")
+        logger.error(f"Error killing process {pid}: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Error killing process: {str(e)}"
         )
 
 
-@router.post("/kill-all", response_model=dict)
-async def kill_all_processes():
-    """Kill all agent processes."""
+def _kill_all_sync() -> dict:
+    """Kill every agent process tree (blocking)."""
     killed = []
     failed = []
 
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+    # One pass finds the agents and maps every process to its children, so
+    # each agent's tree is resolved without rescanning the process table
+    agents = []
+    children_of = defaultdict(list)
+    procs = {}
+    for proc in psutil.process_iter(['pid', 'ppid', 'cmdline']):
         try:
-            if is_agent_process(proc):
-                pid = proc.info['pid']
-                try:
-                    # Kill children first
-                    children = proc.children(recursive=True)
-                    for child in children:
-                        try:
-                            child.kill()
-                        except psutil.NoSuchProcess:
-                            pass
-
-                    # Kill the parent
-                    proc.kill()
-                    killed.append(pid)
-                except Exception as e:
-                    failed.append({
-                        'pid': pid,
-                        'error': str(e)
-                    })
+            procs[proc.pid] = proc
+            children_of[proc.info['ppid']].append(proc.pid)
+            cmdline_list = proc.info.get('cmdline')
+            if cmdline_list and _is_agent_cmdline(' '.join(cmdline_list)):
+                agents.append(proc)
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
 
+    if agents:
+        # Tree walks and kill syscalls are independent per agent, so run
+        # them concurrently instead of one agent after another
+        with ThreadPoolExecutor(max_workers=min(KILL_WORKERS, len(agents))) as executor:
+            futures = [(proc.pid, executor.submit(_kill_tree, proc, children_of, procs)) for proc in agents]
+
+        for pid, future in futures:
+            try:
+                future.result()
+                killed.append(pid)
+            except Exception as e:
+                failed.append({
+                    'pid': pid,
+                    'error': str(e)
+                })
+
+    _invalidate_process_cache()
+
     return {
         'success': len(failed) == 0,
         'killed': killed,
@@ -231,3 +300,25 @@ async def kill_all_processes():
         'total_killed': len(killed),
         'total_failed': len(failed)
     }
+
+
+# psutil scans and kills block on /proc reads and signals; run them in a
+# worker thread so other HTTP and WebSocket traffic is not stalled
+
+
+@router.get("", response_model=ProcessListResponse)
+async def list_processes():
+    """List all running agent processes."""
+    return await asyncio.to_thread(_list_processes_sync)
+
+
+@router.post("/kill", response_model=KillProcessResponse)
+async def kill_process(request: KillProcessRequest):
+    """Kill a specific process by PID."""
+    return await asyncio.to_thread(_kill_process_sync, request.pid)
+
+
+@router.post("/kill-all", response_model=dict)
+async def kill_all_processes():
+    """Kill all agent processes."""
+    return await asyncio.to_thread(_kill_all_sync)
@@ -250,6 +250,9 @@ async def delete_project(name: str, delete_files: bool = False):
     # Optionally delete files
     if delete_files and project_dir.exists():
         try:
+            # Release pooled connections held by the features API first
+            from api.database import dispose_database
+            dispose_database(project_dir)
             shutil.rmtree(project_dir)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to delete project files: {e}")
@@ -6,17 +6,27 @@ Manages interactive chat session for adding new features to existing projects.
 Uses the add-features.md skill to guide users through feature creation.
 """
 
-import json
+import asyncio
 import logging
 import os
 import shutil
 import sys
-import threading
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import AsyncGenerator, Optional
 
-from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+import orjson
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeAgentOptions,
+    ClaudeSDKClient,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+from sqlalchemy import select
 
 from ..schemas import ImageAttachment
 
@@ -37,6 +47,69 @@ async def _make_multimodal_message(content_blocks: list[dict]) -> AsyncGenerator
 
 # Root directory of the project
 ROOT_DIR = Path(__file__).parent.parent.parent
+_ROOT_DIR_RESOLVED = str(ROOT_DIR.resolve())
+
+# Interpreter used for the feature MCP server
+_PYTHON_EXE = sys.executable
+
+# Path to the claude CLI, looked up once it is found on PATH
+_CLAUDE_CLI: Optional[str] = None
+
+
+def _find_claude_cli() -> Optional[str]:
+    """Locate the claude CLI, caching the result once it is found."""
+    global _CLAUDE_CLI
+    if _CLAUDE_CLI is None:
+        _CLAUDE_CLI = shutil.which("claude")
+    return _CLAUDE_CLI
+
+
+# Security settings for the add-features Claude client, serialized once
+_SECURITY_SETTINGS_JSON = orjson.dumps(
+    {
+        "sandbox": {"enabled": False},
+        "permissions": {
+            "defaultMode": "acceptEdits",
+            "allow": [
+                "Read(./**)",
+                "Write(./**)",
+                "Edit(./**)",
+                "Glob(./**)",
+            ],
+        },
+    },
+    option=orjson.OPT_INDENT_2,
+)
+
+# Rendered existing-feature lists, keyed by everything the list shows
+FORMAT_CACHE_SIZE = 8
+_format_cache: dict[tuple, str] = {}
+
+
+@lru_cache(maxsize=32)
+def _read_text_cached(path_str: str, mtime_ns: int) -> str:
+    """Read a text file; mtime_ns is only part of the cache key."""
+    return Path(path_str).read_text(encoding="utf-8", errors="replace")
+
+
+def _read_text(path: Path) -> str:
+    """
+    Read a text file, reusing the last read while it is unmodified (blocking).
+
+    The skill and app_spec files are read on every session start but
+    rarely change; keying on mtime picks up edits automatically.
+    """
+    return _read_text_cached(str(path), path.stat().st_mtime_ns)
+
+
+def _write_settings(settings_file: Path) -> None:
+    """Write the Claude security settings file unless it is already current (blocking)."""
+    try:
+        if settings_file.read_bytes() == _SECURITY_SETTINGS_JSON:
+            return
+    except FileNotFoundError:
+        pass
+    settings_file.write_bytes(_SECURITY_SETTINGS_JSON)
 
 
 def generate_wave_label() -> str:
@@ -83,7 +156,7 @@ class AddFeaturesSession:
                 self._client_entered = False
                 self.client = None
 
-    def _load_project_context(self) -> dict:
+    async def _load_project_context(self) -> dict:
         """Load existing project context: spec, features, and stats."""
         context = {
             "project_name": self.project_name,
@@ -97,18 +170,35 @@ class AddFeaturesSession:
         spec_path = self.project_dir / "prompts" / "app_spec.txt"
         if spec_path.exists():
             try:
-                context["app_spec"] = spec_path.read_text(encoding="utf-8")
+                context["app_spec"] = await asyncio.to_thread(_read_text, spec_path)
             except Exception as e:
                 logger.warning(f"Failed to read app_spec.txt: {e}")
 
-        # Load features from database
+        # Load features from database without blocking the event loop
+        await asyncio.to_thread(self._load_features_sync, context)
+
+        return context
+
+    def _load_features_sync(self, context: dict) -> None:
+        """Fill in context features and stats from the project database (blocking)."""
         try:
-            from api.database import Feature, create_database
+            from api.database import Feature, get_session_maker
 
-            _, session_maker = create_database(self.project_dir)
-            session = session_maker()
+            session = get_session_maker(self.project_dir)()
             try:
-                features = session.query(Feature).all()
+                # Plain column rows; no need to hydrate (and load steps for)
+                # full ORM objects
+                features = session.execute(
+                    select(
+                        Feature.id,
+                        Feature.name,
+                        Feature.category,
+                        Feature.description,
+                        Feature.passes,
+                        Feature.in_progress,
+                        Feature.label,
+                    )
+                ).all()
                 context["features"] = [
                     {
                         "id": f.id,
@@ -121,18 +211,25 @@ class AddFeaturesSession:
                     for f in features
                 ]
 
-                # Calculate stats
-                context["stats"]["total"] = len(features)
-                context["stats"]["passing"] = sum(1 for f in features if f.passes)
-                context["stats"]["in_progress"] = sum(1 for f in features if f.in_progress)
-                context["stats"]["pending"] = context["stats"]["total"] - context["stats"]["passing"] - context["stats"]["in_progress"]
+                # Calculate stats in a single pass
+                passing = in_progress = 0
+                for f in features:
+                    if f.passes:
+                        passing += 1
+                    if f.in_progress:
+                        in_progress += 1
+                total = len(features)
+                context["stats"] = {
+                    "total": total,
+                    "passing": passing,
+                    "pending": total - passing - in_progress,
+                    "in_progress": in_progress,
+                }
             finally:
                 session.close()
         except Exception as e:
             logger.warning(f"Failed to load features: {e}")
 
-        return context
-
     async def start(self) -> AsyncGenerator[dict, None]:
         """
         Initialize session and get initial greeting from Claude.
@@ -149,13 +246,10 @@ class AddFeaturesSession:
             }
             return
 
-        try:
-            skill_content = skill_path.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            skill_content = skill_path.read_text(encoding="utf-8", errors="replace")
+        skill_content = await asyncio.to_thread(_read_text, skill_path)
 
         # Load project context
-        context = self._load_project_context()
+        context = await self._load_project_context()
 
         # Build context section for the system prompt
         context_section = f"""
@@ -184,39 +278,27 @@ class AddFeaturesSession:
         system_prompt = context_section + skill_content
 
         # Create security settings file
-        security_settings = {
-            "sandbox": {"enabled": False},
-            "permissions": {
-                "defaultMode": "acceptEdits",
-                "allow": [
-                    "Read(./**)",
-                    "Write(./**)",
-                    "Edit(./**)",
-                    "Glob(./**)",
-                ],
-            },
-        }
-        settings_file = self.project_dir / ".claude_settings.json"
-        with open(settings_file, "w") as f:
-            json.dump(security_settings, f, indent=2)
+        project_dir = self.project_dir.resolve()
+        settings_file = project_dir / ".claude_settings.json"
+        await asyncio.to_thread(_write_settings, settings_file)
 
         # Build MCP servers config for feature server
         mcp_servers = {
             "features": {
-                "command": sys.executable,  # Use the same Python that's running this script
+                "command": _PYTHON_EXE,  # Use the same Python that's running this script
                 "args": ["-m", "mcp_server.feature_mcp"],
                 "env": {
                     # Inherit parent environment (PATH, ANTHROPIC_API_KEY, etc.)
                     **os.environ,
                     # Add custom variables
-                    "PROJECT_DIR": str(self.project_dir.resolve()),
-                    "PYTHONPATH": str(ROOT_DIR.resolve()),
+                    "PROJECT_DIR": str(project_dir),
+                    "PYTHONPATH": _ROOT_DIR_RESOLVED,
                 },
             },
         }
 
         # Create Claude SDK client with feature MCP server
-        system_cli = shutil.which("claude")
+        system_cli = _find_claude_cli()
         try:
             self.client = ClaudeSDKClient(
                 options=ClaudeAgentOptions(
@@ -235,8 +317,8 @@ class AddFeaturesSession:
                     ],
                     permission_mode="acceptEdits",
                     max_turns=100,
-                    cwd=str(self.project_dir.resolve()),
-                    settings=str(settings_file.resolve()),
+                    cwd=str(project_dir),
+                    settings=str(settings_file),
                     mcp_servers=mcp_servers,
                 )
             )
@@ -267,6 +349,15 @@ class AddFeaturesSession:
         if not features:
             return "No existing features."
 
+        # Sessions restarted against an unchanged project render the same list
+        cache_key = tuple(
+            (f["id"], f["name"], f.get("category", "Uncategorized"), f.get("label"), bool(f.get("passes")))
+            for f in features
+        )
+        cached = _format_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # Group by category
         by_category: dict[str, list[dict]] = {}
         for f in features:
@@ -283,7 +374,12 @@ class AddFeaturesSession:
                 label = f.get("label") or "Initial"
                 lines.append(f"- {status} [{f['id']}] {f['name']} (label: {label})")
 
-        return "\n".join(lines)
+        formatted = "\n".join(lines)
+        if len(_format_cache) >= FORMAT_CACHE_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            del _format_cache[next(iter(_format_cache))]
+        _format_cache[cache_key] = formatted
+        return formatted
 
     async def send_message(
         self,
@@ -348,91 +444,97 @@ class AddFeaturesSession:
                     }
                 })
             await self.client.query(_make_multimodal_message(content_blocks))
-            logger.info(f"Sent multimodal message with {len(attachments)} image(s)")
+            logger.info("Sent multimodal message with %d image(s)", len(attachments))
         else:
             await self.client.query(message)
 
-        current_text = ""
         pending_spec_write = None  # Track app_spec.txt write
+        pending_bulk_creates: dict[str, Optional[str]] = {}  # feature_create_bulk tool_id -> label
 
-        async for msg in self.client.receive_response():
-            msg_type = type(msg).__name__
+        # Record the streamed text as one assistant message per response
+        response_parts: list[str] = []
+        response_timestamp = datetime.now().isoformat()
 
-            if msg_type == "AssistantMessage" and hasattr(msg, "content"):
+        async for msg in self.client.receive_response():
+            if isinstance(msg, AssistantMessage):
                 for block in msg.content:
-                    block_type = type(block).__name__
-
-                    if block_type == "TextBlock" and hasattr(block, "text"):
+                    if isinstance(block, TextBlock):
                         text = block.text
                         if text:
-                            current_text += text
+                            response_parts.append(text)
                             yield {"type": "text", "content": text}
-                            self.messages.append({
-                                "role": "assistant",
-                                "content": text,
-                                "timestamp": datetime.now().isoformat()
-                            })
 
-                    elif block_type == "ToolUseBlock" and hasattr(block, "name"):
+                    elif isinstance(block, ToolUseBlock):
                         tool_name = block.name
-                        tool_input = getattr(block, "input", {})
-                        tool_id = getattr(block, "id", "")
+                        tool_input = block.input
+                        tool_id = block.id
 
                         # Track feature_create_bulk calls
                         if tool_name == "mcp__features__feature_create_bulk":
                             features_list = tool_input.get("features", [])
                             label = tool_input.get("label", self.wave_label)
-                            logger.info(f"feature_create_bulk called with {len(features_list)} features, label={label}")
+                            pending_bulk_creates[tool_id] = label
+                            logger.info("feature_create_bulk called with %d features, label=%s", len(features_list), label)
 
                         # Track app_spec.txt writes
                         if tool_name in ("Write", "Edit"):
                             file_path = tool_input.get("file_path", "")
                             if "app_spec.txt" in str(file_path):
                                 pending_spec_write = {"tool_id": tool_id, "path": file_path}
-                                logger.info(f"{tool_name} tool called for app_spec.txt: {file_path}")
+                                logger.info("%s tool called for app_spec.txt: %s", tool_name, file_path)
 
-            elif msg_type == "UserMessage" and hasattr(msg, "content"):
+            elif isinstance(msg, UserMessage):
                 for block in msg.content:
-                    block_type = type(block).__name__
-                    if block_type == "ToolResultBlock":
-                        is_error = getattr(block, "is_error", False)
-                        tool_use_id = getattr(block, "tool_use_id", "")
-                        content = getattr(block, "content", "")
+                    if isinstance(block, ToolResultBlock):
+                        is_error = block.is_error
+                        tool_use_id = block.tool_use_id
+                        content = block.content
+
+                        # Only feature_create_bulk results need to be parsed
+                        is_bulk_create = tool_use_id in pending_bulk_creates
+                        bulk_label = pending_bulk_creates.pop(tool_use_id, None)
 
                         if is_error:
-                            logger.warning(f"Tool error: {content}")
+                            logger.warning("Tool error: %s", content)
                             if pending_spec_write and tool_use_id == pending_spec_write.get("tool_id"):
                                 pending_spec_write = None
                         else:
                             # Check for successful feature_create_bulk
-                            if isinstance(content, str) and "created" in content:
+                            if is_bulk_create and isinstance(content, str):
                                 try:
-                                    result = json.loads(content)
+                                    result = orjson.loads(content)
                                     if "created" in result:
                                         count = result["created"]
-                                        label = result.get("label", self.wave_label)
+                                        label = result.get("label", bulk_label)
                                         self.features_created += count
-                                        logger.info(f"Created {count} features with label {label}")
+                                        logger.info("Created %s features with label %s", count, label)
                                         yield {
                                             "type": "features_created",
                                             "count": count,
                                             "label": label
                                         }
-                                except json.JSONDecodeError:
+                                except orjson.JSONDecodeError:
                                     pass
 
                             # Check for successful spec write
                             if pending_spec_write and tool_use_id == pending_spec_write.get("tool_id"):
                                 file_path = pending_spec_write["path"]
-                                full_path = Path(file_path) if Path(file_path).is_absolute() else self.project_dir / file_path
+                                full_path = Path(file_path) if os.path.isabs(file_path) else self.project_dir / file_path
                                 if full_path.exists():
-                                    logger.info(f"app_spec.txt updated at: {full_path}")
+                                    logger.info("app_spec.txt updated at: %s", full_path)
                                     yield {
                                         "type": "spec_updated",
                                         "path": str(file_path)
                                     }
                                 pending_spec_write = None
 
+        if response_parts:
+            self.messages.append({
+                "role": "assistant",
+                "content": "".join(response_parts),
+                "timestamp": response_timestamp
+            })
+
     def is_complete(self) -> bool:
         """Check if feature addition is complete."""
         return self.complete
@@ -446,22 +548,22 @@ class AddFeaturesSession:
         return self.wave_label
 
 
-# Session registry with thread safety
+# Session registry. All access happens on the event loop thread, so reads
+# are plain dict lookups; the lock only orders create/remove/cleanup.
 _sessions: dict[str, AddFeaturesSession] = {}
-_sessions_lock = threading.Lock()
+_sessions_lock = asyncio.Lock()
 
 
 def get_add_features_session(project_name: str) -> Optional[AddFeaturesSession]:
     """Get an existing session for a project."""
-    with _sessions_lock:
-        return _sessions.get(project_name)
+    return _sessions.get(project_name)
 
 
 async def create_add_features_session(project_name: str, project_dir: Path) -> AddFeaturesSession:
     """Create a new session for a project, closing any existing one."""
     old_session: Optional[AddFeaturesSession] = None
 
-    with _sessions_lock:
+    async with _sessions_lock:
         old_session = _sessions.pop(project_name, None)
         session = AddFeaturesSession(project_name, project_dir)
         _sessions[project_name] = session
@@ -479,7 +581,7 @@ async def remove_add_features_session(project_name: str) -> None:
     """Remove and close a session."""
     session: Optional[AddFeaturesSession] = None
 
-    with _sessions_lock:
+    async with _sessions_lock:
         session = _sessions.pop(project_name, None)
 
     if session:
@@ -491,20 +593,22 @@ async def remove_add_features_session(project_name: str) -> None:
 
 def list_add_features_sessions() -> list[str]:
     """List all active session project names."""
-    with _sessions_lock:
-        return list(_sessions.keys())
+    return list(_sessions.keys())
 
 
 async def cleanup_all_add_features_sessions() -> None:
     """Close all active sessions. Called on server shutdown."""
     sessions_to_close: list[AddFeaturesSession] = []
 
-    with _sessions_lock:
+    async with _sessions_lock:
         sessions_to_close = list(_sessions.values())
         _sessions.clear()
 
-    for session in sessions_to_close:
-        try:
-            await session.close()
-        except Exception as e:
-            logger.warning(f"Error closing session {session.project_name}: {e}")
+    # Close concurrently; each close shuts down a Claude CLI subprocess
+    results = await asyncio.gather(
+        *(session.close() for session in sessions_to_close),
+        return_exceptions=True,
+    )
+    for session, result in zip(sessions_to_close, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Error closing session {session.project_name}: {result}")
@@ -80,6 +80,10 @@ class AgentProcessManager:
         self._status_callbacks: Set[Callable[[str], Awaitable[None]]] = set()
         self._callbacks_lock = threading.Lock()
 
+        # Immutable snapshot of output callbacks, rebuilt only on add/remove so
+        # broadcasting a line doesn't copy the set under the lock every time
+        self._output_callbacks_snapshot: tuple[Callable[[str], Awaitable[None]], ...] = ()
+
         # Lock file to prevent multiple instances (stored in project directory)
         self.lock_file = self.project_dir / ".agent.lock"
 
@@ -119,11 +123,13 @@ class AgentProcessManager:
         """Add a callback for output lines."""
         with self._callbacks_lock:
             self._output_callbacks.add(callback)
+            self._output_callbacks_snapshot = tuple(self._output_callbacks)
 
     def remove_output_callback(self, callback: Callable[[str], Awaitable[None]]) -> None:
         """Remove an output callback."""
         with self._callbacks_lock:
             self._output_callbacks.discard(callback)
+            self._output_callbacks_snapshot = tuple(self._output_callbacks)
 
     def add_status_callback(self, callback: Callable[[str], Awaitable[None]]) -> None:
         """Add a callback for status changes."""
@@ -174,11 +180,9 @@ class AgentProcessManager:
 
     async def _broadcast_output(self, line: str) -> None:
         """Broadcast output line to all registered callbacks."""
-        with self._callbacks_lock:
-            callbacks = list(self._output_callbacks)
-
-        for callback in callbacks:
-            await self._safe_callback(callback, line)
+        safe_callback = self._safe_callback
+        for callback in self._output_callbacks_snapshot:
+            await safe_callback(callback, line)
 
     async def _stream_output(self) -> None:
         """Stream process output to callbacks."""